@@ -1,11 +1,14 @@
 from __future__ import annotations
 
 import os
+from contextlib import asynccontextmanager
 from pathlib import Path
+from typing import AsyncIterator
 
-from fastapi import FastAPI, HTTPException
+import anyio
+from fastapi import FastAPI, HTTPException, Query
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.staticfiles import StaticFiles
+from fastapi.responses import StreamingResponse
 
 from .models import (
     CancelTaskResponse,
@@ -14,12 +17,23 @@ from .models import (
     TaskListResponse,
     TaskSummary,
 )
+from .static_files import PrecompressedStaticFiles, precompress
 from .task_manager import TaskManager
 
-app = FastAPI(title="Musubi LoRA 训练调度平台", version="0.1.0")
-
 workspace = Path(os.getenv("MUSUBI_WORKSPACE", "./runs"))
-task_manager = TaskManager(workspace=workspace)
+max_workers = os.getenv("MUSUBI_MAX_WORKERS")
+task_manager = TaskManager(workspace=workspace, max_workers=int(max_workers) if max_workers else None)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI) -> AsyncIterator[None]:
+    yield
+    await anyio.to_thread.run_sync(task_manager.shutdown)
+
+
+app = FastAPI(title="Musubi LoRA 训练调度平台", version="0.1.0", lifespan=lifespan)
+
+LOG_CHUNK_SIZE = 64 * 1024
 
 app.add_middleware(
     CORSMiddleware,
@@ -27,23 +41,24 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Log-Offset"],
 )
 
 
 @app.post("/api/tasks", response_model=TaskDetail)
-def create_task(request: CreateTaskRequest) -> TaskDetail:
-    task = task_manager.create_task(request)
+async def create_task(request: CreateTaskRequest) -> TaskDetail:
+    task = await anyio.to_thread.run_sync(task_manager.create_task, request)
     return task
 
 
 @app.get("/api/tasks", response_model=TaskListResponse)
-def list_tasks() -> TaskListResponse:
+async def list_tasks() -> TaskListResponse:
     tasks = task_manager.list_tasks()
     return TaskListResponse(tasks=tasks)
 
 
 @app.get("/api/tasks/{task_id}", response_model=TaskDetail)
-def get_task(task_id: str) -> TaskDetail:
+async def get_task(task_id: str) -> TaskDetail:
     task = task_manager.get_task(task_id)
     if task is None:
         raise HTTPException(status_code=404, detail="任务不存在")
@@ -51,20 +66,43 @@ def get_task(task_id: str) -> TaskDetail:
 
 
 @app.get("/api/tasks/{task_id}/logs")
-def get_task_logs(task_id: str) -> str:
-    task = task_manager.get_task(task_id)
-    if task is None:
+async def get_task_logs(task_id: str, offset: int = Query(0, ge=0)) -> StreamingResponse:
+    log_path = task_manager.get_log_path(task_id)
+    if log_path is None:
         raise HTTPException(status_code=404, detail="任务不存在")
 
-    log_path = Path(task.log_path)
-    if not log_path.exists():
-        return ""
-    return log_path.read_text(encoding="utf-8")
+    try:
+        size = (await anyio.to_thread.run_sync(log_path.stat)).st_size
+    except FileNotFoundError:
+        size = 0
+    # The log shrank (rewritten): resend from the start; the smaller X-Log-Offset tells the client to reset.
+    if offset > size:
+        offset = 0
+
+    return StreamingResponse(
+        _iter_log(log_path, offset, size),
+        media_type="text/plain; charset=utf-8",
+        headers={"X-Log-Offset": str(size)},
+    )
+
+
+async def _iter_log(log_path: Path, start: int, end: int) -> AsyncIterator[bytes]:
+    if start >= end:
+        return
+    async with await anyio.open_file(log_path, "rb") as log_file:
+        await log_file.seek(start)
+        remaining = end - start
+        while remaining > 0:
+            chunk = await log_file.read(min(LOG_CHUNK_SIZE, remaining))
+            if not chunk:
+                break
+            remaining -= len(chunk)
+            yield chunk
 
 
 @app.post("/api/tasks/{task_id}/cancel", response_model=CancelTaskResponse)
-def cancel_task(task_id: str) -> CancelTaskResponse:
-    response = task_manager.cancel_task(task_id)
+async def cancel_task(task_id: str) -> CancelTaskResponse:
+    response = await anyio.to_thread.run_sync(task_manager.cancel_task, task_id)
     if response is None:
         raise HTTPException(status_code=404, detail="任务不存在或无法取消")
     return response
@@ -73,4 +111,5 @@ def cancel_task(task_id: str) -> CancelTaskResponse:
 # Serve the frontend
 static_dir = Path(__file__).resolve().parent.parent / "frontend"
 if static_dir.exists():
-    app.mount("/", StaticFiles(directory=static_dir, html=True), name="frontend")
+    precompress(static_dir)
+    app.mount("/", PrecompressedStaticFiles(directory=static_dir, html=True), name="frontend")
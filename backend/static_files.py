@@ -0,0 +1,109 @@
+from __future__ import annotations
+
+import gzip
+import mimetypes
+import os
+import re
+from pathlib import Path
+from typing import Callable, List, Optional, Set, Tuple
+
+from starlette.datastructures import Headers
+from starlette.responses import FileResponse, Response
+from starlette.staticfiles import NotModifiedResponse, PathLike, StaticFiles
+from starlette.types import Scope
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - optional dependency
+    brotli = None
+
+COMPRESSIBLE_SUFFIXES = {".html", ".js", ".css", ".svg", ".json", ".txt", ".map"}
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+REVALIDATE_CACHE_CONTROL = "no-cache"
+
+# Bundler-style content-hashed names such as ``app.3f9a1c2b.js``; only these are safe to cache forever.
+_HASHED_NAME_RE = re.compile(r"\.[0-9a-f]{8,}\.[A-Za-z0-9]+$")
+
+
+def _encoders() -> List[Tuple[str, str, Callable[[bytes], bytes]]]:
+    """Available ``(content-encoding, file suffix, compress)`` triples, most preferred first."""
+    encoders: List[Tuple[str, str, Callable[[bytes], bytes]]] = []
+    if brotli is not None:
+        encoders.append(("br", ".br", lambda data: brotli.compress(data, quality=11)))
+    encoders.append(("gzip", ".gz", lambda data: gzip.compress(data, compresslevel=9, mtime=0)))
+    return encoders
+
+
+def precompress(directory: Path) -> None:
+    """Write compressed siblings for every compressible file that lacks an up-to-date one."""
+    encoders = _encoders()
+    for path in directory.rglob("*"):
+        if not path.is_file() or path.suffix not in COMPRESSIBLE_SUFFIXES:
+            continue
+        try:
+            mtime = path.stat().st_mtime
+            data: Optional[bytes] = None
+            for _, suffix, compress in encoders:
+                target = path.with_name(path.name + suffix)
+                if target.exists() and target.stat().st_mtime >= mtime:
+                    continue
+                if data is None:
+                    data = path.read_bytes()
+                target.write_bytes(compress(data))
+        except OSError:
+            # A read-only deployment still works, just without compressed variants.
+            continue
+
+
+class PrecompressedStaticFiles(StaticFiles):
+    """``StaticFiles`` that serves ``.br``/``.gz`` siblings and sets ``Cache-Control``."""
+
+    def file_response(
+        self,
+        full_path: PathLike,
+        stat_result: os.stat_result,
+        scope: Scope,
+        status_code: int = 200,
+    ) -> Response:
+        request_headers = Headers(scope=scope)
+        path = os.fspath(full_path)
+        media_type, _ = mimetypes.guess_type(path)
+        headers = {
+            "cache-control": IMMUTABLE_CACHE_CONTROL if _HASHED_NAME_RE.search(path) else REVALIDATE_CACHE_CONTROL,
+        }
+
+        if os.path.splitext(path)[1] in COMPRESSIBLE_SUFFIXES:
+            headers["vary"] = "Accept-Encoding"
+            accepted = _accepted_encodings(request_headers.get("accept-encoding", ""))
+            for encoding, suffix, _ in _encoders():
+                if encoding not in accepted:
+                    continue
+                try:
+                    variant_stat = os.stat(path + suffix)
+                except OSError:
+                    continue
+                path, stat_result = path + suffix, variant_stat
+                headers["content-encoding"] = encoding
+                break
+
+        response = FileResponse(
+            path,
+            status_code=status_code,
+            stat_result=stat_result,
+            media_type=media_type,
+            headers=headers,
+        )
+        if self.is_not_modified(response.headers, request_headers):
+            return NotModifiedResponse(response.headers)
+        return response
+
+
+def _accepted_encodings(header: str) -> Set[str]:
+    accepted = set()
+    for item in header.split(","):
+        name, _, params = item.partition(";")
+        name = name.strip().lower()
+        if not name or params.replace(" ", "").lower() in {"q=0", "q=0.0", "q=0.00", "q=0.000"}:
+            continue
+        accepted.add(name)
+    return accepted
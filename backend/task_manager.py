@@ -1,10 +1,19 @@
 from __future__ import annotations
 
+import copy
+import itertools
+import multiprocessing
+import os
 import threading
-import uuid
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import dataclass, fields
 from datetime import datetime
 from pathlib import Path
-from typing import Dict, Optional
+from typing import Any, Dict, Optional, Set, TextIO, Tuple
+
+import orjson
 
 from .models import (
     CancelTaskResponse,
@@ -14,30 +23,84 @@ from .models import (
     TaskSummary,
     TrainingParameters,
 )
-from .task_runner import DummyRunner, MusubiRunner, RunnerConfig
+from .task_runner import BaseRunner, DummyRunner, MusubiRunner, ProcessRunner, RunnerConfig
+
+TERMINAL_STATUSES = {TaskStatus.COMPLETED, TaskStatus.FAILED, TaskStatus.CANCELLED}
+
+SNAPSHOT_INTERVAL = 1.0
+
+# Task ids: process start time and pid keep ids unique across restarts, the counter within a process.
+_task_prefix = f"{int(time.time()):08x}{os.getpid():08x}"
+_task_counter = itertools.count()
+
+
+@dataclass(slots=True)
+class _TaskState:
+    """Mutable task record; converted to ``TaskDetail`` only at the API boundary."""
+
+    id: str
+    name: str
+    dataset_path: str
+    output_path: str
+    parameters: TrainingParameters
+    notes: Optional[str]
+    status: TaskStatus
+    progress: float
+    created_at: datetime
+    updated_at: datetime
+    error_message: Optional[str]
+    log_path: Path
 
 
 class TaskManager:
-    def __init__(self, workspace: Path):
+    def __init__(self, workspace: Path, max_workers: Optional[int] = None):
         self.workspace = workspace
+        self.max_workers = max_workers
         self.workspace.mkdir(parents=True, exist_ok=True)
-        self._tasks: Dict[str, TaskDetail] = {}
-        self._runners: Dict[str, object] = {}
+        self._tasks: Dict[str, _TaskState] = {}
+        self._runners: Dict[str, BaseRunner] = {}
         self._lock = threading.Lock()
+        self._runners_lock = threading.Lock()
+        self._log_files: Dict[str, TextIO] = {}
+        self._log_files_lock = threading.Lock()
+        # Worker pool for real training runs, created on first use.
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._mp_manager: Any = None
+        self._events: Any = None
+        self._events_thread: Optional[threading.Thread] = None
+        self._pool_lock = threading.Lock()
+        # Task state is persisted by a background thread at most once per SNAPSHOT_INTERVAL.
+        self._snapshot_path = self.workspace / "tasks.json"
+        self._dirty: Set[str] = set()
+        self._snapshot_lock = threading.Lock()
+        self._stop_snapshots = threading.Event()
+        self._load_snapshot()
+        self._snapshotter = threading.Thread(target=self._snapshot_loop, name="task-snapshotter", daemon=True)
+        self._snapshotter.start()
 
     def list_tasks(self) -> Dict[str, TaskSummary]:
         with self._lock:
-            return {task_id: self._to_summary(task) for task_id, task in self._tasks.items()}
+            items = [(task_id, copy.copy(task)) for task_id, task in self._tasks.items()]
+        return {task_id: self._to_summary(task) for task_id, task in items}
 
     def get_task(self, task_id: str) -> Optional[TaskDetail]:
         with self._lock:
-            return self._tasks.get(task_id)
+            task = self._tasks.get(task_id)
+            if task is None:
+                return None
+            task = copy.copy(task)
+        return self._to_detail(task)
+
+    def get_log_path(self, task_id: str) -> Optional[Path]:
+        with self._lock:
+            task = self._tasks.get(task_id)
+        return task.log_path if task is not None else None
 
     def create_task(self, request: CreateTaskRequest) -> TaskDetail:
-        task_id = uuid.uuid4().hex
+        task_id = f"{_task_prefix}{next(_task_counter):x}"
         now = datetime.now()
         log_path = self.workspace / f"{task_id}.log"
-        task = TaskDetail(
+        task = _TaskState(
             id=task_id,
             name=request.name,
             dataset_path=request.dataset_path,
@@ -49,50 +112,198 @@ class TaskManager:
             created_at=now,
             updated_at=now,
             error_message=None,
-            log_path=str(log_path),
+            log_path=log_path,
         )
 
         with self._lock:
             self._tasks[task_id] = task
+            self._dirty.add(task_id)
 
-        runner = self._build_runner(task, request.simulate)
-        self._runners[task_id] = runner
-        runner.start()
-        return task
+        detail = self._to_detail(task)
+        try:
+            self._start_runner(task, request.simulate)
+        except Exception as exc:
+            message = f"任务启动失败: {exc}"
+            self._update_task(task_id, status=TaskStatus.FAILED, progress=0.0, message=message)
+            failed = self.get_task(task_id)
+            if failed is not None:
+                return failed
+            return detail.copy(update={"status": TaskStatus.FAILED, "error_message": message})
+        return detail
 
     def cancel_task(self, task_id: str) -> Optional[CancelTaskResponse]:
-        runner = self._runners.get(task_id)
-        task = self.get_task(task_id)
+        with self._runners_lock:
+            runner = self._runners.get(task_id)
+        with self._lock:
+            task = self._tasks.get(task_id)
         if runner is None or task is None:
             return None
 
-        if hasattr(runner, "cancel"):
-            runner.cancel()
+        runner.cancel()
 
         self._update_task(task_id, status=TaskStatus.CANCELLED, progress=0.0)
         return CancelTaskResponse(id=task_id, status=TaskStatus.CANCELLED, message="任务已取消")
 
     def append_log(self, task_id: str, message: str) -> None:
-        task = self.get_task(task_id)
+        with self._lock:
+            task = self._tasks.get(task_id)
         if not task:
             return
-        with open(task.log_path, "a", encoding="utf-8") as log_file:
+        with self._log_files_lock:
+            log_file = self._log_files.get(task_id)
+            if log_file is None:
+                # Line buffered so messages stay ordered with the runner's own writes to the same file.
+                log_file = self._log_files[task_id] = open(task.log_path, "a", buffering=1, encoding="utf-8")
             log_file.write(message + "\n")
 
-    def _build_runner(self, task: TaskDetail, simulate: bool):
+    def _close_log(self, task_id: str) -> None:
+        with self._log_files_lock:
+            log_file = self._log_files.pop(task_id, None)
+        if log_file is not None:
+            log_file.close()
+
+    def _start_runner(self, task: _TaskState, simulate: bool) -> None:
+        try:
+            self._register_and_start(task, simulate)
+        except BrokenProcessPool:
+            # A worker died and took the pool with it; rebuild once and retry.
+            self._reset_process_pool()
+            self._register_and_start(task, simulate)
+
+    def _register_and_start(self, task: _TaskState, simulate: bool) -> None:
+        runner = self._build_runner(task, simulate)
+        # Registered before start() so a fast terminal update can unregister it again.
+        with self._runners_lock:
+            self._runners[task.id] = runner
+        try:
+            runner.start()
+        except BaseException:
+            with self._runners_lock:
+                self._runners.pop(task.id, None)
+            raise
+
+    def _build_runner(self, task: _TaskState, simulate: bool) -> BaseRunner:
         config = RunnerConfig(
             task_id=task.id,
             name=task.name,
             dataset_path=task.dataset_path,
             output_path=task.output_path,
-            parameters=TrainingParameters.parse_obj(task.parameters.dict()),
-            log_path=Path(task.log_path),
+            parameters=task.parameters.copy(),
+            log_path=task.log_path,
             notes=task.notes,
         )
 
-        runner_cls = DummyRunner if simulate else MusubiRunner
-        runner = runner_cls(config, lambda progress, status, message: self._update_task(task.id, progress=progress, status=status, message=message))
-        return runner
+        callback = lambda progress, status, message: self._update_task(task.id, progress=progress, status=status, message=message)
+        if simulate:
+            return DummyRunner(config, callback)
+
+        executor, events, mp_manager = self._ensure_process_pool()
+        return ProcessRunner(config, callback, MusubiRunner, executor, events, mp_manager.Event())
+
+    def shutdown(self) -> None:
+        """Cancel in-flight runs, stop the worker pool and write a final snapshot."""
+        with self._runners_lock:
+            task_ids = list(self._runners)
+        for task_id in task_ids:
+            self.cancel_task(task_id)
+
+        with self._pool_lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=True, cancel_futures=True)
+                self._events.put(None)
+                assert self._events_thread is not None
+                self._events_thread.join()
+                self._mp_manager.shutdown()
+                self._executor = None
+
+        self._stop_snapshots.set()
+        self._snapshotter.join()
+        self._write_snapshot()
+
+    def _snapshot_loop(self) -> None:
+        while not self._stop_snapshots.wait(SNAPSHOT_INTERVAL):
+            self._write_snapshot()
+
+    def _write_snapshot(self) -> None:
+        with self._snapshot_lock:
+            with self._lock:
+                if not self._dirty:
+                    return
+                dirty = list(self._dirty)
+                self._dirty.clear()
+                tasks = [copy.copy(task) for task in self._tasks.values()]
+
+            records = []
+            for task in tasks:
+                record = {field.name: getattr(task, field.name) for field in fields(task)}
+                record["parameters"] = task.parameters.dict()
+                record["log_path"] = str(task.log_path)
+                records.append(record)
+            tmp_path = self._snapshot_path.with_suffix(".json.tmp")
+            try:
+                tmp_path.write_bytes(orjson.dumps(records))
+                os.replace(tmp_path, self._snapshot_path)
+            except OSError:
+                # Retry on the next tick.
+                with self._lock:
+                    self._dirty.update(dirty)
+
+    def _load_snapshot(self) -> None:
+        if not self._snapshot_path.exists():
+            return
+        for record in orjson.loads(self._snapshot_path.read_bytes()):
+            detail = TaskDetail.parse_obj(record)
+            values = {field.name: getattr(detail, field.name) for field in fields(_TaskState)}
+            values["log_path"] = Path(detail.log_path)
+            task = _TaskState(**values)
+            if task.status not in TERMINAL_STATUSES:
+                # Its runner died with the previous process.
+                task.status = TaskStatus.FAILED
+                task.error_message = "服务重启，任务已中断"
+                task.updated_at = datetime.now()
+                self._dirty.add(task.id)
+            self._tasks[task.id] = task
+
+    def _ensure_process_pool(self) -> Tuple[ProcessPoolExecutor, Any, Any]:
+        with self._pool_lock:
+            if self._executor is None:
+                # spawn: forking a process that already runs server threads is unsafe.
+                context = multiprocessing.get_context("spawn")
+                mp_manager = context.Manager()
+                try:
+                    events = mp_manager.Queue()
+                    executor = ProcessPoolExecutor(max_workers=self.max_workers, mp_context=context)
+                except BaseException:
+                    mp_manager.shutdown()
+                    raise
+                events_thread = threading.Thread(target=self._drain_events, args=(events,), name="runner-events", daemon=True)
+                events_thread.start()
+                self._mp_manager, self._events, self._events_thread, self._executor = mp_manager, events, events_thread, executor
+            return self._executor, self._events, self._mp_manager
+
+    def _reset_process_pool(self) -> None:
+        """Drop a broken pool so the next real run builds a fresh one."""
+        with self._pool_lock:
+            executor, mp_manager = self._executor, self._mp_manager
+            self._executor = self._mp_manager = self._events = self._events_thread = None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+        if mp_manager is not None:
+            # Also ends the old listener thread, whose queue goes away with the manager.
+            mp_manager.shutdown()
+
+    def _drain_events(self, events: Any) -> None:
+        """Apply progress reported by worker processes, in arrival order."""
+        while True:
+            try:
+                event = events.get()
+            except (EOFError, OSError):
+                # The manager process went away, e.g. during interpreter exit.
+                return
+            if event is None:
+                return
+            task_id, progress, status, message = event
+            self._update_task(task_id, progress=progress, status=status, message=message)
 
     def _update_task(
         self,
@@ -103,29 +314,44 @@ class TaskManager:
         message: Optional[str] = None,
         error_message: Optional[str] = None,
     ) -> None:
-        with self._lock:
-            task = self._tasks[task_id]
-            updates = {}
-            if progress is not None:
-                updates["progress"] = max(0.0, min(progress, 1.0))
-            if status is not None:
-                updates["status"] = status
-                if status == TaskStatus.FAILED and message:
-                    updates["error_message"] = message
-                elif status in {TaskStatus.RUNNING, TaskStatus.COMPLETED, TaskStatus.CANCELLED} and "error_message" not in updates:
-                    updates["error_message"] = None
-            if error_message is not None:
-                updates["error_message"] = error_message
-            if updates:
-                updates["updated_at"] = datetime.now()
-                self._tasks[task_id] = task.copy(update=updates)
-                if status in {TaskStatus.COMPLETED, TaskStatus.FAILED, TaskStatus.CANCELLED}:
-                    self._runners.pop(task_id, None)
+        updates = {}
+        if progress is not None:
+            updates["progress"] = max(0.0, min(progress, 1.0))
+        if status is not None:
+            updates["status"] = status
+            if status == TaskStatus.FAILED and message:
+                updates["error_message"] = message
+            elif status in {TaskStatus.RUNNING, TaskStatus.COMPLETED, TaskStatus.CANCELLED} and "error_message" not in updates:
+                updates["error_message"] = None
+        if error_message is not None:
+            updates["error_message"] = error_message
+        if updates:
+            updates["updated_at"] = datetime.now()
+            with self._lock:
+                task = self._tasks[task_id]
+                if task.status in TERMINAL_STATUSES and status not in TERMINAL_STATUSES:
+                    # Late ticks from a runner that was already cancelled.
+                    return
+                if (
+                    (progress is None or abs(updates["progress"] - task.progress) < 1e-4)
+                    and (status is None or status == task.status)
+                    and error_message is None
+                    and not message
+                ):
+                    return
+                for field, value in updates.items():
+                    setattr(task, field, value)
+                self._dirty.add(task_id)
 
+        if status in TERMINAL_STATUSES:
+            with self._runners_lock:
+                self._runners.pop(task_id, None)
         if message:
             self.append_log(task_id, message)
+        if status in TERMINAL_STATUSES:
+            self._close_log(task_id)
 
-    def _to_summary(self, task: TaskDetail) -> TaskSummary:
+    def _to_summary(self, task: _TaskState) -> TaskSummary:
         return TaskSummary(
             id=task.id,
             name=task.name,
@@ -134,3 +360,19 @@ class TaskManager:
             created_at=task.created_at,
             updated_at=task.updated_at,
         )
+
+    def _to_detail(self, task: _TaskState) -> TaskDetail:
+        return TaskDetail(
+            id=task.id,
+            name=task.name,
+            status=task.status,
+            progress=task.progress,
+            created_at=task.created_at,
+            updated_at=task.updated_at,
+            dataset_path=task.dataset_path,
+            output_path=task.output_path,
+            parameters=task.parameters,
+            notes=task.notes,
+            error_message=task.error_message,
+            log_path=str(task.log_path),
+        )
@@ -1,23 +1,41 @@
 from __future__ import annotations
 
-import json
+import asyncio
 import os
+import re
 import shlex
 import shutil
+import selectors
 import subprocess
+import tempfile
 import threading
 import time
+from concurrent.futures import Executor, Future
 from dataclasses import dataclass
 from datetime import datetime
 from pathlib import Path
-from typing import Callable, Optional
+from typing import Any, BinaryIO, Callable, Optional, TextIO, Type
+
+import orjson
 
 from .models import TaskStatus, TrainingParameters
 
 ProgressCallback = Callable[[float, TaskStatus, Optional[str]], None]
 
+LOG_BUFFER_SIZE = 1 << 16
+LOG_FLUSH_LINES = 64
+LOG_FLUSH_INTERVAL = 0.1
+
+STDOUT_POLL_INTERVAL = 0.2
+STDOUT_CHUNK_SIZE = 1 << 16
+
+EMIT_MIN_PROGRESS_DELTA = 0.01
+EMIT_MIN_INTERVAL = 0.25
 
-@dataclass
+_PROGRESS_RE = re.compile(rb"progress[^\n]*?(\d{1,3})(?:\.\d+)?\s*%", re.IGNORECASE)
+
+
+@dataclass(slots=True, frozen=True)
 class RunnerConfig:
     task_id: str
     name: str
@@ -34,6 +52,8 @@ class BaseRunner:
         self.progress_callback = progress_callback
         self._thread: Optional[threading.Thread] = None
         self._cancel_event = threading.Event()
+        self._last_emit_progress = -1.0
+        self._last_emit_ts = 0.0
 
     def start(self) -> None:
         self._thread = threading.Thread(target=self._run_wrapper, daemon=True)
@@ -46,16 +66,29 @@ class BaseRunner:
     def _handle_cancel(self) -> None:
         """Hook for subclasses to override when a cancel event occurs."""
 
+    def _emit(self, progress: float, status: TaskStatus, message: Optional[str]) -> None:
+        """Forward an update, dropping running ticks that advance <1% within 250ms of the last one."""
+        now = time.monotonic()
+        if (
+            status == TaskStatus.RUNNING
+            and progress - self._last_emit_progress < EMIT_MIN_PROGRESS_DELTA
+            and now - self._last_emit_ts < EMIT_MIN_INTERVAL
+        ):
+            return
+        self._last_emit_progress = progress
+        self._last_emit_ts = now
+        self.progress_callback(progress, status, message)
+
     def _run_wrapper(self) -> None:
         try:
-            self.progress_callback(0.0, TaskStatus.RUNNING, "任务已开始执行")
+            self._emit(0.0, TaskStatus.RUNNING, "任务已开始执行")
             self.run()
         except Exception as exc:  # pragma: no cover - defensive programming
             message = f"任务执行失败: {exc}"
-            self.progress_callback(0.0, TaskStatus.FAILED, message)
+            self._emit(0.0, TaskStatus.FAILED, message)
         else:
             if not self._cancel_event.is_set():
-                self.progress_callback(1.0, TaskStatus.COMPLETED, "任务已完成")
+                self._emit(1.0, TaskStatus.COMPLETED, "任务已完成")
 
     def run(self) -> None:
         raise NotImplementedError
@@ -64,12 +97,16 @@ class BaseRunner:
 class MusubiRunner(BaseRunner):
     """Runner that invokes musubi-tuner through its CLI interface."""
 
+    # Resolved on first successful lookup and reused for the life of the process.
+    _executable_cache: Optional[str] = None
+
     def __init__(self, config: RunnerConfig, progress_callback: ProgressCallback):
         super().__init__(config, progress_callback)
-        self._process: Optional[subprocess.Popen[str]] = None
+        self._process: Optional[subprocess.Popen[bytes]] = None
 
     def run(self) -> None:  # pragma: no cover - relies on external tool
-        executable = shutil.which("musubi-tuner")
+        executable = type(self)._executable_cache or shutil.which("musubi-tuner")
+        type(self)._executable_cache = executable
         if executable is None:
             raise RuntimeError("未找到 musubi-tuner 可执行文件，请确认已安装并在 PATH 中")
 
@@ -77,30 +114,66 @@ class MusubiRunner(BaseRunner):
         command = self._build_command(executable)
         env = os.environ.copy()
         env.setdefault("PYTHONUNBUFFERED", "1")
+        env.setdefault("PYTHONIOENCODING", "utf-8")
 
-        with open(self.config.log_path, "w", encoding="utf-8") as log_file:
-            log_file.write(f"[{datetime.now().isoformat()}] 启动命令: {' '.join(shlex.quote(arg) for arg in command)}\n")
+        # Append mode: TaskManager writes its own messages to the same file concurrently.
+        with open(self.config.log_path, "ab", buffering=LOG_BUFFER_SIZE) as log_file:
+            header = f"[{datetime.now().isoformat()}] 启动命令: {' '.join(shlex.quote(arg) for arg in command)}\n"
+            log_file.write(header.encode("utf-8"))
             log_file.flush()
             self._process = subprocess.Popen(
                 command,
                 stdout=subprocess.PIPE,
                 stderr=subprocess.STDOUT,
-                text=True,
+                bufsize=0,
                 env=env,
             )
 
             assert self._process.stdout is not None
-            for line in self._process.stdout:
-                if self._cancel_event.is_set():
-                    break
-                log_file.write(line)
-                log_file.flush()
-                self._parse_progress(line)
+            self._pump_output(self._process.stdout, log_file)
+            if self._cancel_event.is_set():
+                # In a worker process nobody else calls _handle_cancel for us.
+                self._handle_cancel()
 
             return_code = self._process.wait()
             if return_code != 0 and not self._cancel_event.is_set():
                 raise RuntimeError(f"musubi-tuner 训练失败 (退出码 {return_code})")
 
+    def _pump_output(self, stdout: BinaryIO, log_file: BinaryIO) -> None:
+        """Copy trainer output to the log, waking up at least every poll interval to check for cancellation."""
+        os.set_blocking(stdout.fileno(), False)
+        pending = b""
+        unflushed_lines = 0
+        last_flush = time.monotonic()
+        with selectors.DefaultSelector() as selector:
+            selector.register(stdout, selectors.EVENT_READ)
+            while not self._cancel_event.is_set():
+                events = selector.select(timeout=STDOUT_POLL_INTERVAL)
+                if events:
+                    chunk = stdout.read(STDOUT_CHUNK_SIZE)
+                    if chunk == b"":
+                        break
+                    if chunk:
+                        # Split on \r as well so carriage-return progress bars still yield one line per update.
+                        data = pending + chunk
+                        lines = data.splitlines()
+                        pending = b"" if data.endswith((b"\n", b"\r")) else lines.pop()
+                        if lines:
+                            log_file.write(b"\n".join(lines) + b"\n")
+                            unflushed_lines += len(lines)
+                            self._parse_progress(lines)
+
+                now = time.monotonic()
+                if unflushed_lines and (unflushed_lines >= LOG_FLUSH_LINES or now - last_flush > LOG_FLUSH_INTERVAL):
+                    log_file.flush()
+                    unflushed_lines = 0
+                    last_flush = now
+
+        if pending:
+            log_file.write(pending + b"\n")
+            self._parse_progress([pending])
+        log_file.flush()
+
     def _build_command(self, executable: str) -> list[str]:
         parameters = self.config.parameters
         command = [
@@ -133,21 +206,21 @@ class MusubiRunner(BaseRunner):
             "task_id": self.config.task_id,
             "name": self.config.name,
             "notes": self.config.notes,
-            "parameters": json.loads(self.config.parameters.json()),
+            "parameters": self.config.parameters.dict(),
             "generated_at": datetime.now().isoformat(),
         }
-        with open(config_path, "w", encoding="utf-8") as config_file:
-            json.dump(config_payload, config_file, ensure_ascii=False, indent=2)
+        _write_atomic(config_path, orjson.dumps(config_payload, option=orjson.OPT_INDENT_2))
 
         command.extend(["--config", str(config_path)])
         return command
 
-    def _parse_progress(self, line: str) -> None:
-        line_lower = line.lower()
-        if "progress" in line_lower:
-            value = _extract_percentage(line_lower)
+    def _parse_progress(self, lines: list[bytes]) -> None:
+        """Report the newest progress value in a batch of lines; earlier ones are already stale."""
+        for line in reversed(lines):
+            value = _extract_percentage(line)
             if value is not None:
-                self.progress_callback(value, TaskStatus.RUNNING, "训练进行中")
+                self._emit(value, TaskStatus.RUNNING, "训练进行中")
+                return
 
     def _prepare_output_dir(self) -> None:
         Path(self.config.output_path).mkdir(parents=True, exist_ok=True)
@@ -161,39 +234,160 @@ class MusubiRunner(BaseRunner):
                 self._process.kill()
 
 
+class ProcessRunner(BaseRunner):
+    """Runs another runner class inside a worker process of ``executor``.
+
+    The worker reports progress by putting ``(task_id, progress, status, message)`` tuples on
+    ``events``, which the owner drains. ``cancel_event`` must be shareable with the worker,
+    e.g. created by a ``multiprocessing.Manager``.
+    """
+
+    def __init__(
+        self,
+        config: RunnerConfig,
+        progress_callback: ProgressCallback,
+        runner_cls: Type[BaseRunner],
+        executor: Executor,
+        events: Any,
+        cancel_event: Any,
+    ):
+        super().__init__(config, progress_callback)
+        self.runner_cls = runner_cls
+        self._executor = executor
+        self._events = events
+        self._remote_cancel_event = cancel_event
+        self._future: Optional[Future[None]] = None
+
+    def start(self) -> None:
+        self._future = self._executor.submit(
+            run_in_worker, self.runner_cls, self.config, self._events, self._remote_cancel_event
+        )
+        self._future.add_done_callback(self._on_done)
+
+    def _handle_cancel(self) -> None:
+        self._remote_cancel_event.set()
+        if self._future is not None:
+            self._future.cancel()
+
+    def _on_done(self, future: Future[None]) -> None:
+        # Errors raised by the runner are reported from the worker; this only sees pool failures.
+        if future.cancelled():
+            return
+        exc = future.exception()
+        if exc is not None:
+            self.progress_callback(0.0, TaskStatus.FAILED, f"任务执行失败: {exc}")
+
+
+def run_in_worker(runner_cls: Type[BaseRunner], config: RunnerConfig, events: Any, cancel_event: Any) -> None:
+    """Entry point of a ``ProcessRunner`` job inside the worker process."""
+    if cancel_event.is_set():
+        return
+
+    def report(progress: float, status: TaskStatus, message: Optional[str]) -> None:
+        events.put((config.task_id, progress, status, message))
+
+    runner = runner_cls(config, report)
+    runner._cancel_event = cancel_event
+    runner._run_wrapper()
+
+
 class DummyRunner(BaseRunner):
-    """A runner that simulates the training loop for demonstration purposes."""
+    """A runner that simulates the training loop for demonstration purposes.
+
+    Simulated runs are coroutines on one shared event loop rather than one thread each.
+    """
 
     def __init__(self, config: RunnerConfig, progress_callback: ProgressCallback, duration: int = 120):
         super().__init__(config, progress_callback)
         self.duration = duration
+        self._log_file: Optional[TextIO] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._wakeup: Optional[asyncio.Event] = None
 
-    def run(self) -> None:
+    def start(self) -> None:
+        self._loop = _get_simulation_loop()
+        asyncio.run_coroutine_threadsafe(self._run_async(), self._loop)
+
+    def _handle_cancel(self) -> None:
+        if self._loop is not None and self._wakeup is not None:
+            self._loop.call_soon_threadsafe(self._wakeup.set)
+
+    async def _run_async(self) -> None:
+        """Async counterpart of ``BaseRunner._run_wrapper``."""
+        self._wakeup = asyncio.Event()
+        try:
+            self._emit(0.0, TaskStatus.RUNNING, "任务已开始执行")
+            await self._simulate()
+        except Exception as exc:  # pragma: no cover - defensive programming
+            message = f"任务执行失败: {exc}"
+            self._emit(0.0, TaskStatus.FAILED, message)
+        else:
+            if not self._cancel_event.is_set():
+                self._emit(1.0, TaskStatus.COMPLETED, "任务已完成")
+        finally:
+            if self._log_file is not None:
+                self._log_file.close()
+                self._log_file = None
+
+    async def _simulate(self) -> None:
         steps = max(10, int(self.duration / 2))
         self._log(f"开始模拟训练，共 {steps} 步")
         for step in range(steps):
-            if self._cancel_event.is_set():
+            if self._cancel_event.is_set() or await self._sleep(self.duration / steps):
                 self._log("检测到取消请求，停止模拟训练")
-                self.progress_callback(0.0, TaskStatus.CANCELLED, "任务已取消")
+                self._emit(0.0, TaskStatus.CANCELLED, "任务已取消")
                 return
 
-            time.sleep(self.duration / steps)
             progress = (step + 1) / steps
             self._log(f"模拟训练进度: {progress:.2%}")
-            self.progress_callback(progress, TaskStatus.RUNNING, "训练进行中")
+            self._emit(progress, TaskStatus.RUNNING, "训练进行中")
 
         self._log("模拟训练完成")
 
+    async def _sleep(self, seconds: float) -> bool:
+        """Sleep for ``seconds``; return True if woken early by a cancel request."""
+        assert self._wakeup is not None
+        try:
+            await asyncio.wait_for(self._wakeup.wait(), timeout=seconds)
+        except asyncio.TimeoutError:
+            return False
+        return True
+
     def _log(self, message: str) -> None:
+        if self._log_file is None:
+            self._log_file = open(self.config.log_path, "a", buffering=1, encoding="utf-8")
         timestamp = datetime.now().isoformat()
-        with open(self.config.log_path, "a", encoding="utf-8") as log_file:
-            log_file.write(f"[{timestamp}] {message}\n")
+        self._log_file.write(f"[{timestamp}] {message}\n")
+
+
+_simulation_loop: Optional[asyncio.AbstractEventLoop] = None
+_simulation_loop_lock = threading.Lock()
+
+
+def _get_simulation_loop() -> asyncio.AbstractEventLoop:
+    """Return the event loop shared by all simulated runs, starting its thread on first use."""
+    global _simulation_loop
+    with _simulation_loop_lock:
+        if _simulation_loop is None:
+            loop = asyncio.new_event_loop()
+            threading.Thread(target=loop.run_forever, name="dummy-runner-loop", daemon=True).start()
+            _simulation_loop = loop
+        return _simulation_loop
+
 
+def _write_atomic(path: Path, data: bytes) -> None:
+    """Write ``data`` to a temporary sibling of ``path`` and move it into place."""
+    with tempfile.NamedTemporaryFile("wb", dir=path.parent, prefix=f".{path.name}.", delete=False) as tmp_file:
+        tmp_file.write(data)
+    try:
+        os.replace(tmp_file.name, path)
+    except BaseException:
+        os.unlink(tmp_file.name)
+        raise
 
-def _extract_percentage(line: str) -> Optional[float]:
-    import re
 
-    match = re.search(r"(\d{1,3})(?:\.\d+)?\s*%", line)
+def _extract_percentage(line: bytes) -> Optional[float]:
+    match = _PROGRESS_RE.search(line)
     if not match:
         return None
     value = float(match.group(1))
@@ -18,6 +18,9 @@ const cancelButton = document.querySelector('#cancel-button');
 
 let selectedTaskId = null;
 let refreshInterval = null;
+let logOffset = 0;
+let logDecoder = new TextDecoder();
+let logsLoading = false;
 
 async function fetchJSON(url, options) {
   const response = await fetch(url, options);
@@ -66,6 +69,9 @@ async function refreshTasks() {
 }
 
 async function selectTask(taskId) {
+  if (taskId !== selectedTaskId) {
+    resetLogs();
+  }
   selectedTaskId = taskId;
   try {
     const task = await fetchJSON(`${API_BASE}/tasks/${taskId}`);
@@ -89,14 +95,40 @@ function updateTaskDetails(task) {
   cancelButton.disabled = task.status !== 'running' && task.status !== 'pending';
 }
 
+function resetLogs() {
+  logOffset = 0;
+  logDecoder = new TextDecoder();
+  logsContainer.textContent = '';
+}
+
 async function refreshLogs() {
-  if (!selectedTaskId) return;
+  if (!selectedTaskId || logsLoading) return;
+  const taskId = selectedTaskId;
+  logsLoading = true;
   try {
-    const logs = await fetchJSON(`${API_BASE}/tasks/${selectedTaskId}/logs`);
-    logsContainer.textContent = logs;
-    logsContainer.scrollTop = logsContainer.scrollHeight;
+    // 仅拉取上次之后追加的日志内容
+    const response = await fetch(`${API_BASE}/tasks/${taskId}/logs?offset=${logOffset}`);
+    if (!response.ok) {
+      const message = await response.text();
+      throw new Error(message || '请求失败');
+    }
+    const chunk = new Uint8Array(await response.arrayBuffer());
+    if (taskId !== selectedTaskId) return;
+
+    const nextOffset = Number(response.headers.get('X-Log-Offset') ?? logOffset + chunk.length);
+    if (nextOffset < logOffset) {
+      // 日志文件被重写，服务端已从头返回
+      resetLogs();
+    }
+    logOffset = nextOffset;
+    if (chunk.length) {
+      logsContainer.textContent += logDecoder.decode(chunk, { stream: true });
+      logsContainer.scrollTop = logsContainer.scrollHeight;
+    }
   } catch (error) {
     console.error(error);
+  } finally {
+    logsLoading = false;
   }
 }
 